@@ -3,27 +3,50 @@
 FORGED Static Site Generator
 Reads framework.json and generates an ATT&CK-style interactive matrix website.
 
-Workshop Mode: Set FORGE_MODE=preview to include draft techniques with badges.
-Default (production) filters out all drafts.
+Workshop Mode: --mode preview (or FORGE_MODE=preview) includes draft techniques
+with badges. Default (production) filters out all drafts. --mode both builds
+output/ and output-preview/ from a single parse: theme assets, the image and
+CSS stages, the API and the static pages are built once and linked into both,
+and identical pages are hardlinked.
+
+Versions: older framework snapshots in data/versions/*.json, plus any
+--version-rev REV (read from REV:data/framework.json via git), are built into
+/v<version>/ alongside the current version at the root. Identical files across
+versions are hardlinked.
 """
 
+import argparse
 import copy
+import hashlib
 import html as html_module
 import json
 import os
 import shutil
+import subprocess
+import sys
 from pathlib import Path
 from datetime import datetime
 
+from css import STYLESHEET, optimize_css, page_type
+from hints import merge_vercel_headers, preload_routes
+from images import optimize_images
+from querydb import build_query_db
+from weights import page_weight_report
+
 # Paths
 ROOT = Path(__file__).parent.parent
 DATA_DIR = ROOT / "data"
+VERSIONS_DIR = DATA_DIR / "versions"
 TEMPLATE_DIR = ROOT / "generator" / "templates"
 THEME_DIR = ROOT / "theme"
 OUTPUT_DIR = ROOT / "output"
+PREVIEW_OUTPUT_DIR = ROOT / "output-preview"
+CACHE_DIR = ROOT / ".cache"
+BUDGETS_FILE = ROOT / "generator" / "budgets.json"
+PRELOAD_HEADERS_FILE = ROOT / "generator" / "preload-headers.json"
 
-# Workshop mode: "production" (default) or "preview"
-FORGE_MODE = os.environ.get("FORGE_MODE", "production")
+# Workshop modes. The default comes from FORGE_MODE; --mode overrides it.
+MODES = ("production", "preview")
 
 # Tactic colors — distinct per pillar, matched to CSS variables
 TACTIC_COLORS = {
@@ -101,47 +124,82 @@ def load_framework():
         return json.load(f)
 
 
-def ensure_output_dirs():
+def version_key(version):
+    """Sort key for dotted version strings ("1.10" after "1.9")."""
+    return tuple(int(p) if p.isdigit() else 0 for p in version.split("."))
+
+
+def load_version_snapshots(revs):
+    """Load older framework versions from data/versions/*.json and git revisions.
+
+    Returns {version: data}. A git revision wins over a snapshot file that
+    carries the same version.
+    """
+    snapshots = {}
+    if VERSIONS_DIR.exists():
+        for path in sorted(VERSIONS_DIR.glob("*.json")):
+            with open(path, "r") as f:
+                data = json.load(f)
+            snapshots[data["framework"]["version"]] = data
+
+    for rev in revs:
+        result = subprocess.run(
+            ["git", "-C", str(ROOT), "show", f"{rev}:data/framework.json"],
+            capture_output=True, text=True, check=True,
+        )
+        data = json.loads(result.stdout)
+        snapshots[data["framework"]["version"]] = data
+
+    return snapshots
+
+
+def apply_mode(raw_data, mode):
+    """Return the data a build in the given mode should render."""
+    if mode == "production":
+        return filter_framework(raw_data)
+    return raw_data
+
+
+def ensure_output_dirs(out_dir):
     """Create output directory structure."""
-    if OUTPUT_DIR.exists():
-        shutil.rmtree(OUTPUT_DIR)
-    OUTPUT_DIR.mkdir(parents=True)
-    (OUTPUT_DIR / "techniques").mkdir()
-    (OUTPUT_DIR / "tactics").mkdir()
-    (OUTPUT_DIR / "css").mkdir()
-    (OUTPUT_DIR / "js").mkdir()
-    (OUTPUT_DIR / "img").mkdir()
-    (OUTPUT_DIR / "fonts").mkdir()
-
-
-def copy_theme_assets():
-    """Copy CSS, JS, and images to output."""
-    css_src = THEME_DIR / "css"
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    out_dir.mkdir(parents=True)
+    (out_dir / "techniques").mkdir()
+    (out_dir / "tactics").mkdir()
+    (out_dir / "css").mkdir()
+    (out_dir / "js").mkdir()
+    (out_dir / "img").mkdir()
+    (out_dir / "fonts").mkdir()
+
+
+def copy_theme_assets(out_dir):
+    """Copy JS, images and fonts to output.
+
+    Stylesheets are not copied: the CSS stage writes the pruned, fingerprinted
+    forged.css into css/.
+    """
     js_src = THEME_DIR / "js"
     img_src = THEME_DIR / "img"
 
-    if css_src.exists():
-        for f in css_src.iterdir():
-            shutil.copy2(f, OUTPUT_DIR / "css" / f.name)
-
     if js_src.exists():
         for f in js_src.iterdir():
-            shutil.copy2(f, OUTPUT_DIR / "js" / f.name)
+            shutil.copy2(f, out_dir / "js" / f.name)
 
     if img_src.exists():
         for f in img_src.iterdir():
-            shutil.copy2(f, OUTPUT_DIR / "img" / f.name)
+            shutil.copy2(f, out_dir / "img" / f.name)
 
     fonts_src = THEME_DIR / "fonts"
     if fonts_src.exists():
         for f in fonts_src.iterdir():
-            shutil.copy2(f, OUTPUT_DIR / "fonts" / f.name)
+            shutil.copy2(f, out_dir / "fonts" / f.name)
 
     # Copy robots.txt and sitemap.xml to root
     for root_file in ["robots.txt", "sitemap.xml"]:
         src = THEME_DIR / root_file
         if src.exists():
-            shutil.copy2(src, OUTPUT_DIR / root_file)
+            shutil.copy2(src, out_dir / root_file)
 
 
 def read_template(name):
@@ -169,16 +227,16 @@ def slugify(text):
     return text.lower().replace(" ", "-").replace("/", "-").replace("&", "and")
 
 
-def draft_badge_html(size="sm"):
+def draft_badge_html(mode, size="sm"):
     """Generate draft badge HTML for preview mode."""
-    if FORGE_MODE != "preview":
+    if mode != "preview":
         return ""
     return f'<span class="draft-badge draft-badge-{size}">DRAFT</span>'
 
 
-def session_tags_html(tech):
+def session_tags_html(tech, mode):
     """Generate session tags HTML for preview mode."""
-    if FORGE_MODE != "preview":
+    if mode != "preview":
         return ""
     tags = tech.get("session_tags", [])
     if not tags:
@@ -191,7 +249,7 @@ def session_tags_html(tech):
         </section>'''
 
 
-def build_technique_card(tech, tactic_color):
+def build_technique_card(tech, tactic_color, mode):
     """Build HTML for a single technique card in the matrix."""
     sub_methods = tech.get("sub_methods", [])
     sub_count = len(sub_methods)
@@ -199,12 +257,12 @@ def build_technique_card(tech, tactic_color):
 
     # Draft class for dimmed opacity
     wrapper_class = "technique-cell-wrapper"
-    if tech_is_draft and FORGE_MODE == "preview":
+    if tech_is_draft and mode == "preview":
         wrapper_class += " draft"
 
     # Draft badge in preview mode
     draft_badge = ""
-    if tech_is_draft and FORGE_MODE == "preview":
+    if tech_is_draft and mode == "preview":
         draft_badge = f' <span class="draft-badge draft-badge-sm">DRAFT</span>'
 
     # Sub-method indicator badge
@@ -218,7 +276,7 @@ def build_technique_card(tech, tactic_color):
         sub_items = ""
         for sub in sub_methods:
             sub_draft_badge = ""
-            if is_draft(sub) and FORGE_MODE == "preview":
+            if is_draft(sub) and mode == "preview":
                 sub_draft_badge = ' <span class="draft-badge draft-badge-sm">DRAFT</span>'
             sub_items += f'''<a href="techniques/{esc(tech['id'].lower())}.html#{esc(sub['id'].lower().replace('.', '-'))}" class="sub-method-row" style="border-left: 3px solid {tactic_color['border']}">
                 <span class="sub-method-id">{esc(sub['id'])}</span>
@@ -236,7 +294,7 @@ def build_technique_card(tech, tactic_color):
     </div>'''
 
 
-def build_matrix_page(data):
+def build_matrix_page(data, out_dir, mode):
     """Generate the main matrix page."""
     tactics = data["tactics"]
     techniques = data["techniques"]
@@ -256,7 +314,7 @@ def build_matrix_page(data):
         color = TACTIC_COLORS[tid]
         techs = by_tactic[tid]["techniques"]
 
-        tech_cards = "\n".join(build_technique_card(t, color) for t in techs)
+        tech_cards = "\n".join(build_technique_card(t, color, mode) for t in techs)
 
         wide = len(techs) > 12
         col_cls = "tactic-column tactic-column--wide" if wide else "tactic-column"
@@ -307,125 +365,162 @@ def build_matrix_page(data):
     html = html.replace("{{LD_JSON}}", ld_json_website)
     html = html.replace("{{FRAMEWORK_JSON}}", framework_json)
 
-    with open(OUTPUT_DIR / "index.html", "w") as f:
+    with open(out_dir / "index.html", "w") as f:
         f.write(html)
 
     print(f"  Matrix page: {total_tactics} tactics, {total_techniques} techniques")
 
 
-def build_technique_pages(data):
+# Rendered technique pages keyed by their inputs. Shared by every site built
+# in one run, so each unique technique revision is rendered only once.
+_technique_page_cache = {}
+
+
+def render_technique_page(template, tech, tactic, related, mode):
+    """Render one technique page. related maps related technique IDs to names."""
+    color = TACTIC_COLORS[tech["tactic_id"]]
+
+    # Draft indicator for technique header
+    draft_indicator = ""
+    if is_draft(tech) and mode == "preview":
+        draft_indicator = draft_badge_html(mode, "lg")
+
+    # Session tags
+    session_tags = session_tags_html(tech, mode)
+
+    # Build success indicators list
+    indicators_html = ""
+    for ind in tech.get("success_indicators", []):
+        indicators_html += f'<li>{esc(ind)}</li>\n'
+
+    # Build failure modes list
+    failures_html = ""
+    for fail in tech.get("failure_modes", []):
+        failures_html += f'<li>{esc(fail)}</li>\n'
+
+    # Build related techniques links
+    related_html = ""
+    for rel_id, rel_name in related.items():
+        related_html += f'<a href="{esc(rel_id.lower())}.html" class="related-link">{esc(rel_id)}: {esc(rel_name)}</a>\n'
+
+    # Sub-methods section
+    sub_methods = tech.get("sub_methods", [])
+    sub_methods_html = ""
+    if sub_methods:
+        sub_items = ""
+        for sub in sub_methods:
+            anchor = esc(sub['id'].lower().replace('.', '-'))
+            sub_draft = ""
+            if is_draft(sub) and mode == "preview":
+                sub_draft = f' {draft_badge_html(mode, "sm")}'
+            sub_items += f'''
+            <div class="sub-method-card" id="{anchor}" style="border-left: 3px solid {color['border']}">
+                <div class="sub-method-header">
+                    <span class="sub-method-card-id">{esc(sub['id'])}</span>
+                    <span class="sub-method-card-name">{esc(sub['name'])}{sub_draft}</span>
+                </div>
+                <p class="sub-method-desc">{esc(sub['description'])}</p>
+            </div>'''
+        sub_methods_html = f'''
+        <section class="technique-sub-methods">
+            <h2>Sub-Methods <span class="sub-method-count">{len(sub_methods)}</span></h2>
+            <div class="sub-method-grid">
+                {sub_items}
+            </div>
+        </section>'''
+
+    # War story / Field Report — removed from public output
+    war_story_html = ""
+
+    # Build ld+json blocks programmatically (safe JSON escaping)
+    ld_json_article = build_ld_json({
+        "@context": "https://schema.org",
+        "@type": "Article",
+        "headline": f"{tech['id']}: {tech['name']}",
+        "description": tech.get("description", ""),
+        "author": {"@type": "Person", "name": "Pete McKernan", "url": "https://itsbroken.ai"},
+        "publisher": {"@type": "Organization", "name": "Cipher Circle", "url": "https://itsbroken.ai"},
+        "mainEntityOfPage": f"https://forge.itsbroken.ai/techniques/{tech['id'].lower()}.html",
+        "isPartOf": {"@type": "WebSite", "name": "F.O.R.G.E", "url": "https://forge.itsbroken.ai"}
+    })
+    ld_json_breadcrumb = build_ld_json({
+        "@context": "https://schema.org",
+        "@type": "BreadcrumbList",
+        "itemListElement": [
+            {"@type": "ListItem", "position": 1, "name": "Matrix", "item": "https://forge.itsbroken.ai/"},
+            {"@type": "ListItem", "position": 2, "name": tactic["name"], "item": f"https://forge.itsbroken.ai/tactics/{tech['tactic_id'].lower()}.html"},
+            {"@type": "ListItem", "position": 3, "name": tech["id"]}
+        ]
+    })
+
+    html = template.replace("{{TECH_ID}}", esc(tech["id"]))
+    html = html.replace("{{TECH_ID_LOWER}}", esc(tech["id"].lower()))
+    html = html.replace("{{TECH_NAME}}", esc(tech["name"]))
+    html = html.replace("{{TACTIC_ID}}", esc(tech["tactic_id"].lower()))
+    html = html.replace("{{TACTIC_NAME}}", esc(tactic["name"]))
+    html = html.replace("{{TACTIC_COLOR}}", color["border"])
+    html = html.replace("{{TACTIC_BG}}", color["bg"])
+    html = html.replace("{{DESCRIPTION}}", esc(tech.get("description", "")))
+    html = html.replace("{{IMPLEMENTATION}}", esc(tech.get("implementation", "")))
+    html = html.replace("{{INDICATORS}}", indicators_html)
+    html = html.replace("{{FAILURES}}", failures_html)
+    html = html.replace("{{RELATED}}", related_html)
+    html = html.replace("{{SUB_METHODS}}", sub_methods_html)
+    html = html.replace("{{WAR_STORY}}", war_story_html)
+    html = html.replace("{{VERSION}}", esc(tech.get("added_version", "1.0")))
+    html = html.replace("{{DRAFT_INDICATOR}}", draft_indicator)
+    html = html.replace("{{SESSION_TAGS}}", session_tags)
+    html = html.replace("{{LD_JSON}}", ld_json_article + "\n    " + ld_json_breadcrumb)
+
+    return html
+
+
+def technique_depends_on_mode(tech):
+    """True if a technique page renders differently in preview mode."""
+    return (
+        is_draft(tech)
+        or any(is_draft(s) for s in tech.get("sub_methods", []))
+        or bool(tech.get("session_tags"))
+    )
+
+
+def build_technique_pages(data, out_dir, mode):
     """Generate individual technique pages."""
     template = read_template("technique.html")
     techniques = data["techniques"]
     tactics_map = {t["id"]: t for t in data["tactics"]}
     tech_map = {t["id"]: t for t in techniques}
+    rendered = 0
 
     for tech in techniques:
         tactic = tactics_map[tech["tactic_id"]]
-        color = TACTIC_COLORS[tech["tactic_id"]]
-
-        # Draft indicator for technique header
-        draft_indicator = ""
-        if is_draft(tech) and FORGE_MODE == "preview":
-            draft_indicator = draft_badge_html("lg")
-
-        # Session tags
-        session_tags = session_tags_html(tech)
-
-        # Build success indicators list
-        indicators_html = ""
-        for ind in tech.get("success_indicators", []):
-            indicators_html += f'<li>{esc(ind)}</li>\n'
-
-        # Build failure modes list
-        failures_html = ""
-        for fail in tech.get("failure_modes", []):
-            failures_html += f'<li>{esc(fail)}</li>\n'
-
-        # Build related techniques links
-        related_html = ""
-        for rel_id in tech.get("related_techniques", []):
-            if rel_id in tech_map:
-                rel = tech_map[rel_id]
-                related_html += f'<a href="{esc(rel_id.lower())}.html" class="related-link">{esc(rel_id)}: {esc(rel["name"])}</a>\n'
-
-        # Sub-methods section
-        sub_methods = tech.get("sub_methods", [])
-        sub_methods_html = ""
-        if sub_methods:
-            sub_items = ""
-            for sub in sub_methods:
-                anchor = esc(sub['id'].lower().replace('.', '-'))
-                sub_draft = ""
-                if is_draft(sub) and FORGE_MODE == "preview":
-                    sub_draft = f' {draft_badge_html("sm")}'
-                sub_items += f'''
-                <div class="sub-method-card" id="{anchor}" style="border-left: 3px solid {color['border']}">
-                    <div class="sub-method-header">
-                        <span class="sub-method-card-id">{esc(sub['id'])}</span>
-                        <span class="sub-method-card-name">{esc(sub['name'])}{sub_draft}</span>
-                    </div>
-                    <p class="sub-method-desc">{esc(sub['description'])}</p>
-                </div>'''
-            sub_methods_html = f'''
-            <section class="technique-sub-methods">
-                <h2>Sub-Methods <span class="sub-method-count">{len(sub_methods)}</span></h2>
-                <div class="sub-method-grid">
-                    {sub_items}
-                </div>
-            </section>'''
-
-        # War story / Field Report — removed from public output
-        war_story_html = ""
-
-        # Build ld+json blocks programmatically (safe JSON escaping)
-        ld_json_article = build_ld_json({
-            "@context": "https://schema.org",
-            "@type": "Article",
-            "headline": f"{tech['id']}: {tech['name']}",
-            "description": tech.get("description", ""),
-            "author": {"@type": "Person", "name": "Pete McKernan", "url": "https://itsbroken.ai"},
-            "publisher": {"@type": "Organization", "name": "Cipher Circle", "url": "https://itsbroken.ai"},
-            "mainEntityOfPage": f"https://forge.itsbroken.ai/techniques/{tech['id'].lower()}.html",
-            "isPartOf": {"@type": "WebSite", "name": "F.O.R.G.E", "url": "https://forge.itsbroken.ai"}
-        })
-        ld_json_breadcrumb = build_ld_json({
-            "@context": "https://schema.org",
-            "@type": "BreadcrumbList",
-            "itemListElement": [
-                {"@type": "ListItem", "position": 1, "name": "Matrix", "item": "https://forge.itsbroken.ai/"},
-                {"@type": "ListItem", "position": 2, "name": tactic["name"], "item": f"https://forge.itsbroken.ai/tactics/{tech['tactic_id'].lower()}.html"},
-                {"@type": "ListItem", "position": 3, "name": tech["id"]}
-            ]
-        })
+        related = {
+            rel_id: tech_map[rel_id]["name"]
+            for rel_id in tech.get("related_techniques", [])
+            if rel_id in tech_map
+        }
 
-        html = template.replace("{{TECH_ID}}", esc(tech["id"]))
-        html = html.replace("{{TECH_ID_LOWER}}", esc(tech["id"].lower()))
-        html = html.replace("{{TECH_NAME}}", esc(tech["name"]))
-        html = html.replace("{{TACTIC_ID}}", esc(tech["tactic_id"].lower()))
-        html = html.replace("{{TACTIC_NAME}}", esc(tactic["name"]))
-        html = html.replace("{{TACTIC_COLOR}}", color["border"])
-        html = html.replace("{{TACTIC_BG}}", color["bg"])
-        html = html.replace("{{DESCRIPTION}}", esc(tech.get("description", "")))
-        html = html.replace("{{IMPLEMENTATION}}", esc(tech.get("implementation", "")))
-        html = html.replace("{{INDICATORS}}", indicators_html)
-        html = html.replace("{{FAILURES}}", failures_html)
-        html = html.replace("{{RELATED}}", related_html)
-        html = html.replace("{{SUB_METHODS}}", sub_methods_html)
-        html = html.replace("{{WAR_STORY}}", war_story_html)
-        html = html.replace("{{VERSION}}", esc(tech.get("added_version", "1.0")))
-        html = html.replace("{{DRAFT_INDICATOR}}", draft_indicator)
-        html = html.replace("{{SESSION_TAGS}}", session_tags)
-        html = html.replace("{{LD_JSON}}", ld_json_article + "\n    " + ld_json_breadcrumb)
+        # Mode only changes pages that carry draft badges or session tags
+        key = content_hash({
+            "tech": tech,
+            "tactic": tactic,
+            "related": related,
+            "mode": mode if technique_depends_on_mode(tech) else None,
+        })
+        html = _technique_page_cache.get(key)
+        if html is None:
+            html = render_technique_page(template, tech, tactic, related, mode)
+            _technique_page_cache[key] = html
+            rendered += 1
 
         filename = f"{tech['id'].lower()}.html"
-        with open(OUTPUT_DIR / "techniques" / filename, "w") as f:
+        with open(out_dir / "techniques" / filename, "w") as f:
             f.write(html)
 
-    print(f"  Technique pages: {len(techniques)} generated")
+    print(f"  Technique pages: {len(techniques)} generated ({rendered} rendered)")
 
 
-def build_tactic_pages(data):
+def build_tactic_pages(data, out_dir, mode):
     """Generate tactic overview pages."""
     template = read_template("tactic.html")
     techniques = data["techniques"]
@@ -440,8 +535,8 @@ def build_tactic_pages(data):
             sub_count = len(tech.get("sub_methods", []))
             sub_indicator = f' <span class="sub-method-badge-sm">{sub_count}</span>' if sub_count > 0 else ""
             draft_indicator = ""
-            if is_draft(tech) and FORGE_MODE == "preview":
-                draft_indicator = f' {draft_badge_html("sm")}'
+            if is_draft(tech) and mode == "preview":
+                draft_indicator = f' {draft_badge_html(mode, "sm")}'
             table_rows += f'''
             <tr>
                 <td><a href="../techniques/{esc(tech['id'].lower())}.html">{esc(tech['id'])}</a></td>
@@ -459,13 +554,13 @@ def build_tactic_pages(data):
         html = html.replace("{{TABLE_ROWS}}", table_rows)
 
         filename = f"{tactic['id'].lower()}.html"
-        with open(OUTPUT_DIR / "tactics" / filename, "w") as f:
+        with open(out_dir / "tactics" / filename, "w") as f:
             f.write(html)
 
     print(f"  Tactic pages: {len(data['tactics'])} generated")
 
 
-def build_about_page(data):
+def build_about_page(data, out_dir):
     """Generate the about page."""
     template = read_template("about.html")
     html = template.replace("{{VERSION}}", esc(data["framework"]["version"]))
@@ -473,34 +568,34 @@ def build_about_page(data):
     html = html.replace("{{TOTAL_TECHNIQUES}}", str(len(data["techniques"])))
     html = html.replace("{{TOTAL_TACTICS}}", str(len(data["tactics"])))
 
-    with open(OUTPUT_DIR / "about.html", "w") as f:
+    with open(out_dir / "about.html", "w") as f:
         f.write(html)
 
     print("  About page generated")
 
 
-def build_getting_started_page(data):
+def build_getting_started_page(data, out_dir):
     """Generate the getting started page."""
     template = read_template("getting-started.html")
     html = template.replace("{{VERSION}}", esc(data["framework"]["version"]))
 
-    with open(OUTPUT_DIR / "getting-started.html", "w") as f:
+    with open(out_dir / "getting-started.html", "w") as f:
         f.write(html)
 
     print("  Getting Started page generated")
 
 
-def build_terms_page(data):
+def build_terms_page(data, out_dir):
     """Generate the terms of use page."""
     template = read_template("terms.html")
 
-    with open(OUTPUT_DIR / "terms.html", "w") as f:
+    with open(out_dir / "terms.html", "w") as f:
         f.write(template)
 
     print("  Terms page generated")
 
 
-def build_sitemap(data):
+def build_sitemap(data, out_dir):
     """Generate sitemap.xml dynamically from framework data."""
     today = datetime.now().strftime("%Y-%m-%d")
 
@@ -547,16 +642,293 @@ def build_sitemap(data):
 {xml_entries}</urlset>
 """
 
-    with open(OUTPUT_DIR / "sitemap.xml", "w") as f:
+    with open(out_dir / "sitemap.xml", "w") as f:
         f.write(sitemap)
 
     print(f"  Sitemap: {len(urls)} URLs")
 
 
+def build_speculation_rules(data, out_dir):
+    """Write speculationrules.json for the matrix page.
+
+    The CSP (script-src 'self') forbids inline <script type="speculationrules">,
+    so vercel.json delivers this file through the Speculation-Rules header.
+    Links from the matrix into technique and tactic pages are prefetched once
+    the visitor shows intent (hover or pointerdown).
+    """
+    rules = {
+        "prefetch": [{
+            "source": "document",
+            "where": {"and": [
+                {"or": [{"href_matches": "/techniques/*"}, {"href_matches": "/tactics/*"}]},
+                {"selector_matches": ".technique-cell, .tactic-header, .sub-method-row"},
+            ]},
+            "eagerness": "moderate",
+        }]
+    }
+    with open(out_dir / "speculationrules.json", "w") as f:
+        json.dump(rules, f, indent=2)
+
+    print("  Speculation rules: matrix -> techniques, tactics")
+
+
+# Fields the public site never renders; kept out of the API as well
+API_PRIVATE_FIELDS = {"war_story", "session_tags"}
+
+
+def content_hash(record):
+    """Stable short hash of a JSON record, usable as an ETag."""
+    canonical = json.dumps(record, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def write_api_record(path, record):
+    """Write a compact JSON API record with its content hash attached."""
+    record = dict(record, hash=content_hash(record))
+    with open(path, "w") as f:
+        json.dump(record, f, ensure_ascii=False, separators=(",", ":"))
+    return record["hash"]
+
+
+def build_api(data, out_dir, site_path="/"):
+    """Generate the versioned static JSON API under api/v1/.
+
+    Drafts are always stripped, even in preview mode: the API is for tooling,
+    not workshop review. Record URLs are absolute and start with site_path, the
+    path the tree is served under ("/" or "/v<version>/").
+    """
+    data = filter_framework(data)
+    api_dir = out_dir / "api" / "v1"
+    (api_dir / "techniques").mkdir(parents=True)
+    (api_dir / "tactics").mkdir()
+
+    tech_map = {t["id"]: t for t in data["techniques"]}
+
+    tech_index = []
+    for tech in data["techniques"]:
+        path = f"api/v1/techniques/{tech['id'].lower()}.json"
+        url = site_path + path
+        record = {k: v for k, v in tech.items() if k not in API_PRIVATE_FIELDS}
+        # Only reference techniques that have their own endpoint
+        if "related_techniques" in record:
+            record["related_techniques"] = [
+                rel_id for rel_id in record["related_techniques"] if rel_id in tech_map
+            ]
+        digest = write_api_record(out_dir / path, record)
+        tech_index.append({
+            "id": tech["id"],
+            "name": tech["name"],
+            "tactic_id": tech["tactic_id"],
+            "hash": digest,
+            "url": url,
+        })
+
+    tactic_index = []
+    for tactic in data["tactics"]:
+        path = f"api/v1/tactics/{tactic['id'].lower()}.json"
+        url = site_path + path
+        record = dict(tactic, techniques=[
+            {k: t[k] for k in ("id", "name", "hash", "url")}
+            for t in tech_index if t["tactic_id"] == tactic["id"]
+        ])
+        digest = write_api_record(out_dir / path, record)
+        tactic_index.append({"id": tactic["id"], "name": tactic["name"], "hash": digest, "url": url})
+
+    fw = data["framework"]
+    write_api_record(api_dir / "index.json", {
+        "framework": {k: fw[k] for k in ("name", "version", "last_updated")},
+        "tactics": tactic_index,
+        "techniques": tech_index,
+    })
+
+    print(f"  API: {len(tech_index)} techniques, {len(tactic_index)} tactics")
+
+
+def build_query_database(data, mode):
+    """Update the per-mode query database in .cache/ for `forge query`.
+
+    It is not copied into the site: like the API's private fields, its
+    session tags are workshop-only and must not be deployed.
+    """
+    db_path = CACHE_DIR / f"forge-{mode}.db"
+    written, removed, unchanged = build_query_db(data, db_path)
+    print(f"  Query DB: {written} written, {removed} removed, {unchanged} unchanged ({db_path.relative_to(ROOT)})")
+
+
+def dedupe_output(*out_dirs):
+    """Hardlink files with identical bytes anywhere under the given directories.
+
+    The first file seen with a given content hash becomes the canonical copy.
+    Returns (files linked, pages among them, bytes saved).
+    """
+    store = {}
+    linked = pages = saved = 0
+    paths = [p for out_dir in out_dirs for p in sorted(out_dir.rglob("*")) if p.is_file()]
+    for path in paths:
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        canonical = store.setdefault(digest, path)
+        if canonical == path or os.path.samefile(canonical, path):
+            continue
+        size = path.stat().st_size
+        try:
+            tmp = path.with_name(path.name + ".link")
+            os.link(canonical, tmp)
+            os.replace(tmp, path)
+        except OSError:
+            continue
+        linked += 1
+        pages += path.suffix == ".html"
+        saved += size
+    return linked, pages, saved
+
+
+# Outputs that do not depend on the mode: built once per version in the first
+# mode's tree and linked into the other mode's tree
+SHARED_OUTPUTS = ("getting-started.html", "terms.html", "sitemap.xml", "speculationrules.json", "api")
+
+# Theme files and asset stage results, identical in every tree: built once in
+# the first mode's root tree and linked into all the others
+ASSET_OUTPUTS = ("css", "js", "img", "fonts", "robots.txt")
+
+
+def build_site(data, out_dir, mode, site_path="/", shared=True):
+    """Render the pages of one framework version in one mode.
+
+    site_path is the URL path the tree is served under: "/" for the current
+    version, "/v<version>/" for older ones. The mode-independent outputs in
+    SHARED_OUTPUTS are only rendered when shared is true.
+    """
+    is_root = site_path == "/"
+    print(f"\nPreparing output directory...")
+    ensure_output_dirs(out_dir)
+
+    print("\nGenerating pages...")
+    build_matrix_page(data, out_dir, mode)
+    build_technique_pages(data, out_dir, mode)
+    build_tactic_pages(data, out_dir, mode)
+    build_about_page(data, out_dir)
+    if shared:
+        build_getting_started_page(data, out_dir)
+        build_terms_page(data, out_dir)
+        if is_root:
+            build_sitemap(data, out_dir)
+            build_speculation_rules(data, out_dir)
+        build_api(data, out_dir, site_path)
+    if is_root:
+        build_query_database(data, mode)
+
+
+def tree_pages(out_dir, nested=()):
+    """Generated pages of one site tree, skipping the version trees nested in it."""
+    return [
+        p for p in sorted(out_dir.rglob("*.html"))
+        if p.relative_to(out_dir).parts[0] not in nested
+    ]
+
+
+def build_assets(asset_dir, trees, nested):
+    """Copy theme assets into asset_dir and run the image and CSS stages once.
+
+    trees maps each mode to its site trees, first mode first. Image variants
+    are built for the pages of every tree. The first mode's pages are pruned
+    against their own tokens only, so its output is the same whether or not
+    other modes are built alongside it; a later mode only gets its own
+    stylesheet and critical CSS for the pages that differ from the first's.
+    """
+    print("\nCopying theme assets...")
+    copy_theme_assets(asset_dir)
+
+    pages_by_mode = {
+        mode: {
+            page: page_type(page.relative_to(out_dir))
+            for out_dir in out_dirs for page in tree_pages(out_dir, nested)
+        }
+        for mode, out_dirs in trees.items()
+    }
+    all_pages = [page for pages in pages_by_mode.values() for page in pages]
+
+    print("\nOptimizing images...")
+    print(f"  Images: {optimize_images(asset_dir / 'img', all_pages, CACHE_DIR)}")
+
+    print("\nOptimizing CSS...")
+    primary = next(iter(trees))
+    variants = [
+        (pages, [asset_dir / "css"] if mode == primary else [out_dir / "css" for out_dir in trees[mode]])
+        for mode, pages in pages_by_mode.items()
+    ]
+    results = optimize_css(variants, THEME_DIR / "css" / STYLESHEET)
+    for (mode, pages), (stylesheet, critical_sizes, complete, rewritten) in zip(pages_by_mode.items(), results):
+        if stylesheet is None:
+            print(f"  {mode}: all {len(pages)} pages identical to {primary}")
+            continue
+        print(f"  {mode}: css/{stylesheet} for {rewritten} of {len(pages)} pages ({len(trees[mode])} tree(s))")
+        for ptype, size in sorted(critical_sizes.items()):
+            note = ", no stylesheet needed" if ptype in complete else ""
+            print(f"    Critical CSS ({ptype}): {size / 1024:.1f} KB inlined above the fold{note}")
+
+
+def link_outputs(src_dir, dst_dir, names):
+    """Hardlink the named files and directories of src_dir into dst_dir.
+
+    Falls back to copying where hardlinks are not supported.
+    Returns the number of files linked.
+    """
+    linked = 0
+    for name in names:
+        src = src_dir / name
+        if src.is_dir():
+            files = sorted(p for p in src.rglob("*") if p.is_file())
+        else:
+            files = [src] if src.exists() else []
+        for f in files:
+            dst = dst_dir / f.relative_to(src_dir)
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(f, dst)
+            except OSError:
+                shutil.copy2(f, dst)
+            linked += 1
+    return linked
+
+
+def write_versions_index(out_dir, current, older):
+    """Write versions.json so clients can discover every published version."""
+    versions = [{"version": current, "path": "/"}]
+    versions += [{"version": v, "path": f"/v{v}/"} for v in older]
+    with open(out_dir / "versions.json", "w") as f:
+        json.dump({"latest": current, "versions": versions}, f, indent=2)
+
+
+def output_dirs_for(modes):
+    """Map each mode to its output directory.
+
+    A single-mode build always writes to output/, so preview.sh and deploy.sh
+    keep working; building both puts the preview site in output-preview/.
+    """
+    if len(modes) == 1:
+        return {modes[0]: OUTPUT_DIR}
+    return {"production": OUTPUT_DIR, "preview": PREVIEW_OUTPUT_DIR}
+
+
 def main():
+    parser = argparse.ArgumentParser(description="FORGED static site generator")
+    parser.add_argument(
+        "--mode", choices=MODES + ("both",),
+        default=os.environ.get("FORGE_MODE", "production"),
+        help="production filters drafts, preview shows them with badges, both builds each "
+             "(default: $FORGE_MODE or production)",
+    )
+    parser.add_argument(
+        "--version-rev", action="append", default=[], metavar="REV",
+        help="also build data/framework.json as of this git revision into /v<version>/",
+    )
+    args = parser.parse_args()
+    modes = MODES if args.mode == "both" else (args.mode,)
+    out_dirs = output_dirs_for(modes)
+
     print("FORGED Static Site Generator")
     print("=" * 50)
-    print(f"  Mode: {FORGE_MODE}")
+    print(f"  Mode: {args.mode}")
 
     print("\nLoading framework data...")
     raw_data = load_framework()
@@ -571,48 +943,85 @@ def main():
     print(f"  Tactics: {len(raw_data['tactics'])}")
     print(f"  Techniques: {len(all_techs)} total ({published_count} published, {draft_count} draft)")
 
-    # Apply workshop mode filter
-    if FORGE_MODE == "production" and draft_count > 0:
-        data = filter_framework(raw_data)
+    if "production" in modes and draft_count > 0:
         print(f"  Production mode: {draft_count} draft(s) filtered out")
-    else:
-        data = raw_data
-        if FORGE_MODE == "preview" and draft_count > 0:
-            print(f"  Preview mode: {draft_count} draft(s) included with badges")
-
-    print(f"\nPreparing output directory...")
-    ensure_output_dirs()
-
-    print("Copying theme assets...")
-    copy_theme_assets()
-
-    print("\nGenerating pages...")
-    build_matrix_page(data)
-    build_technique_pages(data)
-    build_tactic_pages(data)
-    build_about_page(data)
-    build_getting_started_page(data)
-    build_terms_page(data)
-    build_sitemap(data)
-    asset_ver = add_asset_versions()
-    print(f"  Asset cache-bust: {asset_ver}")
+    if "preview" in modes and draft_count > 0:
+        print(f"  Preview mode: {draft_count} draft(s) included with badges")
+
+    snapshots = load_version_snapshots(args.version_rev)
+    snapshots.pop(fw["version"], None)
+    older = sorted(snapshots, key=version_key, reverse=True)
+    if older:
+        print(f"  Older versions: {', '.join('v' + v for v in older)}")
+
+    nested = {f"v{v}" for v in older}
+    trees = []
+    for mode, out_dir in out_dirs.items():
+        trees.append((mode, apply_mode(raw_data, mode), out_dir, "/"))
+        for version in older:
+            trees.append((mode, apply_mode(snapshots[version], mode), out_dir / f"v{version}", f"/v{version}/"))
+
+    # Mode-independent outputs are built in the first mode's trees only
+    primary = out_dirs[modes[0]]
+    for mode, data, out_dir, site_path in trees:
+        if site_path == "/":
+            print(f"\n=== {mode} -> {out_dir.relative_to(ROOT)}/ ===")
+        else:
+            print(f"\n--- {mode} v{data['framework']['version']} -> {site_path} ---")
+        build_site(data, out_dir, mode, site_path, shared=mode == modes[0])
+
+    trees_by_mode = {}
+    for mode, _, out_dir, _ in trees:
+        trees_by_mode.setdefault(mode, []).append(out_dir)
+    build_assets(primary, trees_by_mode, nested)
+
+    shared = 0
+    for mode, _, out_dir, _ in trees:
+        source = primary / out_dir.relative_to(out_dirs[mode])
+        if mode != modes[0]:
+            shared += link_outputs(source, out_dir, SHARED_OUTPUTS)
+        if out_dir != primary:
+            shared += link_outputs(primary, out_dir, ASSET_OUTPUTS)
+    if shared:
+        print(f"\nShared: {shared} mode- and version-independent file(s) linked into {len(trees) - 1} other tree(s)")
+
+    for out_dir in out_dirs.values():
+        write_versions_index(out_dir, fw["version"], older)
+
+    # vercel.json deploys output/, so only a production build there owns its headers
+    if "production" in out_dirs:
+        routes = preload_routes(out_dirs["production"], exclude=nested)
+        changed = merge_vercel_headers(ROOT / "vercel.json", routes, PRELOAD_HEADERS_FILE)
+        print(f"\nPreload headers: {len(routes)} route(s), vercel.json {'updated' if changed else 'unchanged'}")
+
+    over_budget = []
+    measured = {}
+    for mode, out_dir in out_dirs.items():
+        print(f"\nPage weight ({mode}):")
+        try:
+            violations = page_weight_report(
+                out_dir, BUDGETS_FILE, CACHE_DIR / f"page-weight-{mode}.json",
+                exclude=nested, measured=measured,
+            )
+        except ValueError as e:
+            sys.exit(f"Invalid page budgets: {e}")
+        for v in violations:
+            print(f"  OVER BUDGET: {v}")
+        if mode == "production":
+            over_budget += violations
+
+    linked, pages, saved = dedupe_output(*out_dirs.values())
+    print(f"\nDeduplicated: {linked} identical file(s) hardlinked ({pages} pages), {saved / 1024:.0f} KB saved")
 
     print("\n" + "=" * 50)
-    print(f"Site generated at: {OUTPUT_DIR}")
-    total_files = sum(1 for _ in OUTPUT_DIR.rglob("*.html"))
-    print(f"Total HTML files: {total_files}")
-    print("Done.")
-
+    for out_dir in out_dirs.values():
+        print(f"Site generated at: {out_dir}")
+        total_files = sum(1 for _ in out_dir.rglob("*.html"))
+        print(f"Total HTML files: {total_files}")
 
-def add_asset_versions():
-    """Append a content hash to the stylesheet URL so returning visitors get fresh CSS."""
-    import hashlib
-    ver = hashlib.sha1((OUTPUT_DIR / "css" / "forged.css").read_bytes()).hexdigest()[:8]
-    for f in OUTPUT_DIR.rglob("*.html"):
-        t = f.read_text()
-        if 'css/forged.css"' in t:
-            f.write_text(t.replace('css/forged.css"', f'css/forged.css?v={ver}"'))
-    return ver
+    if over_budget:
+        sys.exit(f"Production build failed: {len(over_budget)} page(s) over budget (see {BUDGETS_FILE.relative_to(ROOT)})")
+    print("Done.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,241 @@
+"""
+FORGED CSS Stage
+Prunes forged.css down to the rules the generated site actually uses, inlines
+the rules each page type needs above the fold as critical CSS, and loads the
+pruned, fingerprinted stylesheet at the end of <body> so it no longer blocks
+first paint.
+
+Each template marks its fold with a <!-- fold --> comment after the content
+the first viewport shows (e.g. the header, description, implementation and
+indicator sections of a technique page); everything before it renders from
+the inlined rules and the marker is stripped from the output. The site CSP
+(script-src 'self') rules out onload-swap tricks for async stylesheets, so the
+full stylesheet is linked as the last element in <body>, and left out entirely
+on page types whose inlined rules already cover the whole page.
+"""
+
+import hashlib
+import re
+
+STYLESHEET = "forged.css"
+
+# Classes toggled at runtime by matrix.js. They never appear in the static
+# markup, so the pruner has to keep their rules unconditionally.
+SAFELIST = {
+    "hidden", "highlight", "matrix--flat", "draft",
+    "active", "expanded", "selected", "copied",
+    "select-mode", "select-mode-active",
+    "technique-checkbox", "sub-method-checkbox",
+}
+
+COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+CLASS_ATTR_RE = re.compile(r'\bclass="([^"]*)"')
+ID_ATTR_RE = re.compile(r'\bid="([^"]*)"')
+TAG_RE = re.compile(r'<([a-zA-Z][\w-]*)')
+PSEUDO_RE = re.compile(r'::?[\w-]+(?:\([^)]*\))?')
+ATTR_SEL_RE = re.compile(r'\[[^\]]*\]')
+SEL_CLASS_RE = re.compile(r'\.([\w-]+)')
+SEL_ID_RE = re.compile(r'#([\w-]+)')
+SEL_TAG_RE = re.compile(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)')
+FOLD_MARKER = "<!-- fold -->"
+FOLD_MARKER_RE = re.compile(r'\n[ \t]*' + re.escape(FOLD_MARKER))
+STYLESHEET_LINK_RE = re.compile(r'\s*<link rel="stylesheet" href="((?:\.\./)*)css/' + re.escape(STYLESHEET) + r'">')
+
+
+def parse_css(text):
+    """Parse CSS into a list of nodes.
+
+    Nodes are ("rule", selectors, body), ("block", prelude, children) for
+    nested at-rules such as @media, and ("raw", text) for any other at-rule,
+    which is always kept verbatim.
+    """
+    text = COMMENT_RE.sub("", text)
+    nodes, _ = _parse_nodes(text, 0)
+    return nodes
+
+
+def _parse_nodes(text, pos):
+    nodes = []
+    while pos < len(text):
+        brace = text.find("{", pos)
+        close = text.find("}", pos)
+        if close != -1 and (brace == -1 or close < brace):
+            return nodes, close + 1
+        if brace == -1:
+            break
+        prelude = text[pos:brace].strip()
+        if prelude.startswith(("@media", "@supports")):
+            children, pos = _parse_nodes(text, brace + 1)
+            nodes.append(("block", prelude, children))
+        elif prelude.startswith("@"):
+            end = _matching_brace(text, brace)
+            nodes.append(("raw", text[pos:end + 1].strip()))
+            pos = end + 1
+        else:
+            end = text.find("}", brace)
+            body = " ".join(text[brace + 1:end].split())
+            nodes.append(("rule", [s.strip() for s in prelude.split(",")], body))
+            pos = end + 1
+    return nodes, len(text)
+
+
+def _matching_brace(text, brace):
+    depth = 0
+    for i in range(brace, len(text)):
+        if text[i] == "{":
+            depth += 1
+        elif text[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(text) - 1
+
+
+def new_tokens():
+    return {"classes": set(), "ids": set(), "tags": set()}
+
+
+def used_tokens(html):
+    """Collect the classes, IDs and tag names that appear in a page's markup."""
+    tokens = new_tokens()
+    for value in CLASS_ATTR_RE.findall(html):
+        tokens["classes"].update(value.split())
+    tokens["ids"].update(ID_ATTR_RE.findall(html))
+    tokens["tags"].update(t.lower() for t in TAG_RE.findall(html))
+    return tokens
+
+
+def split_fold(html):
+    """Split a page's source at its fold marker: (above the fold, the rest).
+
+    A page without a marker is treated as entirely above the fold.
+    """
+    fold = html.find(FOLD_MARKER)
+    if fold == -1:
+        return html, ""
+    return html[:fold], html[fold:]
+
+
+def merge_tokens(into, other):
+    for key in into:
+        into[key] |= other[key]
+
+
+def selector_used(selector, tokens):
+    """True if every class, ID and tag the selector needs is present.
+
+    Pseudo-classes and attribute selectors are ignored, which errs on the
+    side of keeping a rule.
+    """
+    bare = ATTR_SEL_RE.sub("", PSEUDO_RE.sub("", selector))
+    return (
+        all(c in tokens["classes"] for c in SEL_CLASS_RE.findall(bare))
+        and all(i in tokens["ids"] for i in SEL_ID_RE.findall(bare))
+        and all(t.lower() in tokens["tags"] for t in SEL_TAG_RE.findall(bare))
+    )
+
+
+def prune(nodes, tokens):
+    """Return CSS text containing only the rules whose selectors are used."""
+    out = []
+    for node in nodes:
+        if node[0] == "rule":
+            selectors = [s for s in node[1] if selector_used(s, tokens)]
+            if selectors:
+                out.append(f"{','.join(selectors)}{{{node[2]}}}")
+        elif node[0] == "block":
+            inner = prune(node[2], tokens)
+            if inner:
+                out.append(f"{node[1]}{{{inner}}}")
+        else:
+            out.append(node[1])
+    return "".join(out)
+
+
+def page_type(rel_path):
+    """Classify a generated page by the template it came from."""
+    if rel_path.parts[0] in ("techniques", "tactics"):
+        return rel_path.parts[0]
+    if rel_path.name == "index.html":
+        return "matrix"
+    return "content"
+
+
+def optimize_css(variants, source):
+    """Prune, fingerprint and split the source stylesheet for one or more site variants.
+
+    variants is a list of (pages, css_dirs): pages maps each page path to its
+    page type, and the variant's stylesheet is written into each of css_dirs.
+    Each variant is pruned against its own tokens plus those of the variants
+    before it, so the first variant's output never depends on the later ones.
+    A page byte-identical to one in an earlier variant gets exactly that
+    page's output, so the two stay identical.
+
+    Returns, per variant, (fingerprinted file name, {page type: critical CSS
+    bytes}, page types that need no external stylesheet, pages rewritten with
+    them). A variant whose pages all match earlier ones returns (None, {}, set(), 0).
+    """
+    nodes = parse_css(source.read_text())
+
+    # Identical pages (across trees and variants) are only scanned once
+    scanned = {}
+    # (page source, page type) -> the page's rewritten source
+    outputs = {}
+    by_type, fold_by_type = {}, {}
+    results = []
+
+    for pages, css_dirs in variants:
+        own = {}
+        for page, ptype in pages.items():
+            html = page.read_text()
+            if (html, ptype) in outputs:
+                page.write_text(outputs[html, ptype])
+                continue
+            own[page] = (html, ptype)
+            if html not in scanned:
+                top, rest = split_fold(html)
+                scanned[html] = used_tokens(top), used_tokens(rest)
+            fold_tokens, rest_tokens = scanned[html]
+            merge_tokens(fold_by_type.setdefault(ptype, new_tokens()), fold_tokens)
+            merge_tokens(by_type.setdefault(ptype, new_tokens()), fold_tokens)
+            merge_tokens(by_type[ptype], rest_tokens)
+
+        if not own:
+            results.append((None, {}, set(), 0))
+            continue
+
+        # matrix.js restores saved state (e.g. the flat layout) on load, so its
+        # classes belong in the matrix page's critical set
+        if "matrix" in fold_by_type:
+            by_type["matrix"]["classes"] |= SAFELIST
+            fold_by_type["matrix"]["classes"] |= SAFELIST
+
+        site_tokens = new_tokens()
+        site_tokens["classes"] |= SAFELIST
+        for tokens in by_type.values():
+            merge_tokens(site_tokens, tokens)
+
+        pruned = prune(nodes, site_tokens)
+        ver = hashlib.sha1(pruned.encode()).hexdigest()[:8]
+        name = f"forged.{ver}.css"
+        for css_dir in css_dirs:
+            (css_dir / name).write_text(pruned)
+
+        critical = {ptype: prune(nodes, tokens) for ptype, tokens in fold_by_type.items()}
+        complete = {ptype for ptype, tokens in by_type.items() if prune(nodes, tokens) == critical[ptype]}
+
+        for page, (html, ptype) in own.items():
+            t = FOLD_MARKER_RE.sub("", html)
+            match = STYLESHEET_LINK_RE.search(t)
+            if match:
+                prefix = match.group(1)
+                t = t[:match.start()] + f"\n    <style>{critical[ptype]}</style>" + t[match.end():]
+                if ptype not in complete:
+                    t = t.replace("</body>", f'    <link rel="stylesheet" href="{prefix}css/{name}">\n</body>', 1)
+            outputs[html, ptype] = t
+            page.write_text(t)
+
+        sizes = {ptype: len(css.encode()) for ptype, css in critical.items()}
+        results.append((name, sizes, complete, len(own)))
+
+    return results
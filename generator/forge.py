@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+FORGE command line tool
+Queries the offline SQLite database the site build keeps in
+.cache/forge-<mode>.db. The production database holds published methods only;
+the preview one adds drafts.
+
+    ./forge query "context recovery" --tactic FT04 --format md
+    ./forge query --mode preview --status draft
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from querydb import query
+
+ROOT = Path(__file__).parent.parent
+CACHE_DIR = ROOT / ".cache"
+MODES = ("production", "preview")
+
+
+def format_markdown(results):
+    if not results:
+        return "_No matching methods._"
+    lines = []
+    for r in results:
+        parent = f" (in {r['technique_id']})" if r["kind"] == "sub_method" else ""
+        lines.append(f"### {r['id']}: {r['name']}{parent}")
+        lines.append(f"{r['tactic_id']} · {r['status']}" + (f" · score {r['score']:.2f}" if r["score"] is not None else ""))
+        if r["snippet"]:
+            lines.append("")
+            lines.append(r["snippet"])
+        lines.append("")
+    return "\n".join(lines).rstrip()
+
+
+def cmd_query(args):
+    if args.db is None:
+        args.db = CACHE_DIR / f"forge-{args.mode}.db"
+    if not args.db.exists():
+        sys.exit(f"Database not found: {args.db} (run python3 generator/build.py --mode {args.mode} first)")
+
+    start = time.perf_counter()
+    results = query(
+        args.db, " ".join(args.text),
+        tactic=args.tactic, status=args.status, tag=args.tag, related=args.related, limit=args.limit,
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if args.format == "md":
+        print(format_markdown(results))
+    else:
+        print(json.dumps({"results": results, "elapsed_ms": round(elapsed_ms, 2)}, ensure_ascii=False, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="forge", description="F.O.R.G.E command line tool")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    q = sub.add_parser("query", help="search techniques and sub-methods")
+    q.add_argument("text", nargs="*", help="keywords (all must match); omit to list by filters only")
+    q.add_argument("--tactic", help="tactic ID, e.g. FT04")
+    q.add_argument("--status", choices=["published", "draft"], help="technique status")
+    q.add_argument("--tag", help="session tag")
+    q.add_argument("--related", metavar="ID", help="techniques related to this technique ID")
+    q.add_argument("--limit", type=int, default=20)
+    q.add_argument("--format", choices=["json", "md"], default="json")
+    q.add_argument(
+        "--mode", choices=MODES, default=os.environ.get("FORGE_MODE", "production"),
+        help="which build's database to query (default: $FORGE_MODE or production)",
+    )
+    q.add_argument("--db", type=Path, help="database path (default: .cache/forge-<mode>.db)")
+    q.set_defaults(func=cmd_query)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
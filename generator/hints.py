@@ -0,0 +1,179 @@
+"""
+FORGED Resource Hints
+Records what every generated page needs before it can render, or would only
+discover late, and turns that page dependency graph into per-route `Link`
+headers in vercel.json.
+
+Local stylesheets linked from <head> and local fonts pulled in by CSS (only
+found once it is parsed) are preloaded. Cross-origin stylesheets in <head>,
+such as Google Fonts, get a preconnect to their origin, plus a crossorigin
+preconnect to the origin serving the font files they import, so those
+connections are set up while the HTML is still downloading. The stylesheet
+the CSS stage defers to the end of <body>, scripts and images, all of which
+the preload scanner finds in the markup, are left alone.
+
+The entries written into vercel.json are recorded in a sidecar file, so the
+next build replaces exactly those and never touches hand-written entries.
+"""
+
+import json
+import posixpath
+import re
+from urllib.parse import urlsplit
+
+LINK_TAG_RE = re.compile(r'<link\b[^>]*>')
+ATTR_RE = re.compile(r'([\w-]+)="([^"]*)"')
+HEAD_END_RE = re.compile(r'</head>')
+STYLE_BLOCK_RE = re.compile(r'<style>(.*?)</style>', re.S)
+FONT_FACE_RE = re.compile(r'@font-face\s*{([^}]*)}')
+CSS_URL_RE = re.compile(r'url\(\s*[\'"]?([^\'")]+)[\'"]?\s*\)')
+
+FONT_TYPES = {".woff2": "font/woff2", ".woff": "font/woff"}
+
+# Font CSS hosts and the origin their stylesheets load font files from
+FONT_FILE_ORIGINS = {"https://fonts.googleapis.com": "https://fonts.gstatic.com"}
+
+
+def is_local(url):
+    return not url.startswith(("http:", "https:", "//", "data:", "mailto:"))
+
+
+def origin(url):
+    parts = urlsplit(url if not url.startswith("//") else "https:" + url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def site_path(base_dir, url):
+    """Resolve a URL relative to base_dir (a site path) to an absolute site path."""
+    return posixpath.normpath(posixpath.join(base_dir, url.split("?")[0]))
+
+
+def css_fonts(css, base_dir):
+    """Return the preferred font file of every @font-face rule in a stylesheet."""
+    fonts = []
+    for body in FONT_FACE_RE.findall(css):
+        urls = [u for u in CSS_URL_RE.findall(body) if is_local(u)]
+        urls.sort(key=lambda u: 0 if u.endswith(".woff2") else 1)
+        if urls:
+            fonts.append(site_path(base_dir, urls[0]))
+    return fonts
+
+
+def head_stylesheets(head):
+    """hrefs of the stylesheets linked from <head>, in document order."""
+    hrefs = []
+    for tag in LINK_TAG_RE.findall(head):
+        attrs = dict(ATTR_RE.findall(tag))
+        if attrs.get("rel") == "stylesheet" and attrs.get("href"):
+            hrefs.append(attrs["href"])
+    return hrefs
+
+
+def page_dependencies(out_dir, page):
+    """List the render-critical dependencies of a page, in load-priority order.
+
+    Each entry is (URL or site path, Link header parameters).
+    """
+    html = page.read_text()
+    head_end = HEAD_END_RE.search(html)
+    head = html[:head_end.start()] if head_end else ""
+    base_dir = "/" + page.parent.relative_to(out_dir).as_posix()
+    deps = []
+
+    hrefs = head_stylesheets(head)
+    for host in dict.fromkeys(origin(h) for h in hrefs if not is_local(h)):
+        deps.append((host, "rel=preconnect"))
+        if host in FONT_FILE_ORIGINS:
+            deps.append((FONT_FILE_ORIGINS[host], "rel=preconnect; crossorigin"))
+
+    stylesheets = [site_path(base_dir, h) for h in hrefs if is_local(h)]
+    css_texts = STYLE_BLOCK_RE.findall(head)
+    fonts = [f for css in css_texts for f in css_fonts(css, base_dir)]
+    for sheet in stylesheets:
+        sheet_file = out_dir / sheet.lstrip("/")
+        if sheet_file.exists():
+            fonts += css_fonts(sheet_file.read_text(), posixpath.dirname(sheet))
+
+    for sheet in stylesheets:
+        deps.append((sheet, "rel=preload; as=style"))
+    for font in dict.fromkeys(fonts):
+        ext = posixpath.splitext(font)[1]
+        if ext in FONT_TYPES:
+            deps.append((font, f'rel=preload; as=font; type="{FONT_TYPES[ext]}"; crossorigin'))
+
+    return deps
+
+
+def link_header(deps):
+    return ", ".join(f"<{url}>; {params}" for url, params in deps)
+
+
+def page_routes(page, out_dir):
+    """Vercel source patterns that serve a page."""
+    rel = page.relative_to(out_dir).as_posix()
+    if rel == "index.html":
+        return ["/", "/index.html"]
+    return ["/" + rel]
+
+
+def preload_routes(out_dir, exclude=()):
+    """Build {route source: Link header value} from the page dependency graph.
+
+    Pages in the same directory that share a dependency list collapse into a
+    single "/<dir>/(.*)" route. Top-level directories in exclude are skipped.
+    """
+    graph = {}
+    for page in sorted(out_dir.rglob("*.html")):
+        rel = page.relative_to(out_dir)
+        if rel.parts[0] in exclude:
+            continue
+        deps = page_dependencies(out_dir, page)
+        if deps:
+            graph[page] = link_header(deps)
+
+    by_dir = {}
+    for page, header in graph.items():
+        by_dir.setdefault(page.parent, []).append((page, header))
+
+    routes = {}
+    for directory, pages in by_dir.items():
+        headers = {header for _, header in pages}
+        if directory != out_dir and len(headers) == 1:
+            routes["/" + directory.relative_to(out_dir).as_posix() + "/(.*)"] = headers.pop()
+            continue
+        for page, header in pages:
+            for route in page_routes(page, out_dir):
+                routes[route] = header
+    return routes
+
+
+def merge_vercel_headers(vercel_path, routes, sidecar_path):
+    """Replace the previously generated Link entries in vercel.json with the given routes.
+
+    sidecar_path records the entries written last time; only entries identical
+    to one of them are removed, so hand-written entries (Link-only or not)
+    are always kept. Returns True if vercel.json changed.
+    """
+    previous = []
+    if sidecar_path.exists():
+        with open(sidecar_path, "r") as f:
+            previous = json.load(f)
+
+    original = vercel_path.read_text()
+    config = json.loads(original)
+    kept = [e for e in config.get("headers", []) if e not in previous]
+    generated = [
+        {"source": source, "headers": [{"key": "Link", "value": value}]}
+        for source, value in sorted(routes.items())
+    ]
+    config["headers"] = kept + generated
+
+    sidecar = json.dumps(generated, indent=2, ensure_ascii=False)
+    if not sidecar_path.exists() or sidecar_path.read_text() != sidecar:
+        sidecar_path.write_text(sidecar)
+
+    updated = json.dumps(config, indent=2, ensure_ascii=False)
+    if updated == original:
+        return False
+    vercel_path.write_text(updated)
+    return True
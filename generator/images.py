@@ -0,0 +1,168 @@
+"""
+FORGED Image Stage
+Losslessly recompresses theme PNGs, produces WebP and resized variants for the
+sizes the templates actually display, and rewrites <img> tags into <picture>
+elements with srcset and explicit dimensions.
+
+Results are cached by source hash under .cache/images, so unchanged images are
+not reprocessed between builds.
+
+Optional dependency: Pillow. Without it, images are copied unmodified and
+<img> tags are left untouched.
+"""
+
+import hashlib
+import re
+import shutil
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Pixel densities to generate for every displayed size
+DENSITIES = (1, 2)
+
+IMG_TAG_RE = re.compile(r'<img\b[^>]*>')
+ATTR_RE = re.compile(r'([\w-]+)="([^"]*)"')
+SRC_RE = re.compile(r'^((?:\.\./)*)img/([\w.-]+)\.png$')
+
+
+def parse_img_tag(tag):
+    """Return the attributes of an <img> tag as a dict, in source order."""
+    return dict(ATTR_RE.findall(tag))
+
+
+def collect_display_sizes(pages):
+    """Scan generated HTML for local PNG <img> tags with explicit dimensions.
+
+    Returns {image stem: {(width, height), ...}}.
+    """
+    sizes = {}
+    for page in pages:
+        for tag in IMG_TAG_RE.findall(page.read_text()):
+            attrs = parse_img_tag(tag)
+            match = SRC_RE.match(attrs.get("src", ""))
+            if not match or not attrs.get("width", "").isdigit() or not attrs.get("height", "").isdigit():
+                continue
+            sizes.setdefault(match.group(2), set()).add((int(attrs["width"]), int(attrs["height"])))
+    return sizes
+
+
+def variant_name(stem, width, ext):
+    """File name of a resized variant, e.g. taribai-logo-48.webp."""
+    return f"{stem}-{width}.{ext}"
+
+
+def save_png(im, path):
+    """Save a PNG with maximum lossless compression."""
+    im.save(path, "PNG", optimize=True)
+
+
+def save_webp(im, path):
+    """Save a lossless WebP."""
+    im.save(path, "WEBP", lossless=True, quality=100, method=6)
+
+
+def build_variants(src, sizes, entry_dir):
+    """Write the optimized original plus every resized PNG/WebP variant into entry_dir.
+
+    Only files missing from entry_dir are produced, so a cache entry can be
+    extended when a template starts displaying an image at a new size.
+    Returns the number of files written.
+    """
+    stem = src.stem
+    written = 0
+    # Opening only reads the header; pixels are decoded on first resize/save
+    with Image.open(src) as im:
+        optimized = entry_dir / src.name
+        if not optimized.exists():
+            save_png(im, optimized)
+            # Keep the original if it was already better compressed
+            if optimized.stat().st_size >= src.stat().st_size:
+                shutil.copy2(src, optimized)
+            written += 1
+
+        for width, height in sorted(sizes):
+            for density in DENSITIES:
+                w, h = width * density, height * density
+                if w > im.width or h > im.height:
+                    continue
+                png_path = entry_dir / variant_name(stem, w, "png")
+                webp_path = entry_dir / variant_name(stem, w, "webp")
+                if png_path.exists() and webp_path.exists():
+                    continue
+                resized = im.resize((w, h), Image.LANCZOS)
+                save_png(resized, png_path)
+                save_webp(resized, webp_path)
+                written += 2
+
+    return written
+
+
+def srcset(prefix, stem, width, ext, available):
+    """Build a density srcset from the variants that exist for this width."""
+    parts = []
+    for density in DENSITIES:
+        name = variant_name(stem, width * density, ext)
+        if name in available:
+            parts.append(f"{prefix}img/{name} {density}x")
+    return ", ".join(parts)
+
+
+def rewrite_img_tag(tag, available):
+    """Turn a local PNG <img> into a <picture> with WebP and PNG srcsets."""
+    attrs = parse_img_tag(tag)
+    match = SRC_RE.match(attrs.get("src", ""))
+    if not match or not attrs.get("width", "").isdigit():
+        return tag
+    prefix, stem = match.groups()
+    width = int(attrs["width"])
+
+    base = variant_name(stem, width, "png")
+    if base not in available:
+        return tag
+
+    attrs["src"] = f"{prefix}img/{base}"
+    attrs["srcset"] = srcset(prefix, stem, width, "png", available)
+    attrs.setdefault("decoding", "async")
+    img_attrs = " ".join(f'{k}="{v}"' for k, v in attrs.items())
+    webp_srcset = srcset(prefix, stem, width, "webp", available)
+    return f'<picture><source type="image/webp" srcset="{webp_srcset}"><img {img_attrs}></picture>'
+
+
+def optimize_images(img_dir, pages, cache_dir):
+    """Optimize img_dir in place and rewrite <img> tags in the given pages.
+
+    Variants are produced for every size any of the pages displays, so one
+    img/ directory can serve several site trees.
+    Returns a short summary string for the build log.
+    """
+    if Image is None:
+        return "skipped (Pillow not installed)"
+
+    sizes = collect_display_sizes(pages)
+    cache_root = cache_dir / "images"
+    before = after = processed = 0
+    available = set()
+
+    for src in sorted(img_dir.glob("*.png")):
+        digest = hashlib.sha256(src.read_bytes()).hexdigest()[:16]
+        entry_dir = cache_root / f"{src.stem}-{digest}"
+        entry_dir.mkdir(parents=True, exist_ok=True)
+        if build_variants(src, sizes.get(src.stem, set()), entry_dir):
+            processed += 1
+
+        before += src.stat().st_size
+        for f in entry_dir.iterdir():
+            shutil.copy2(f, img_dir / f.name)
+            available.add(f.name)
+        after += (img_dir / src.name).stat().st_size
+
+    for page in pages:
+        t = page.read_text()
+        rewritten = IMG_TAG_RE.sub(lambda m: rewrite_img_tag(m.group(0), available), t)
+        if rewritten != t:
+            page.write_text(rewritten)
+
+    return f"{before // 1024} KB -> {after // 1024} KB, {processed} processed, variants for {len(sizes)} displayed image(s)"
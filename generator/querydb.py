@@ -0,0 +1,224 @@
+"""
+FORGED Query Database
+Builds a compact SQLite database with an FTS5 full-text table over technique and
+sub-method text, plus relational tables for tactics, related techniques and
+session tags. Used offline by `forge query` and agent tooling.
+
+The database is updated incrementally: each technique row stores a content
+hash, and only techniques whose hash changed are rewritten.
+"""
+
+import hashlib
+import json
+import sqlite3
+
+SCHEMA_VERSION = "3"
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE tactics (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE TABLE techniques (
+    id TEXT PRIMARY KEY,
+    tactic_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    added_version TEXT,
+    hash TEXT NOT NULL
+);
+CREATE TABLE sub_methods (
+    id TEXT PRIMARY KEY,
+    technique_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE TABLE related_techniques (
+    technique_id TEXT NOT NULL,
+    related_id TEXT NOT NULL,
+    PRIMARY KEY (technique_id, related_id)
+);
+CREATE TABLE session_tags (
+    technique_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (technique_id, tag)
+);
+CREATE INDEX techniques_tactic ON techniques (tactic_id);
+CREATE INDEX sub_methods_technique ON sub_methods (technique_id);
+CREATE INDEX related_reverse ON related_techniques (related_id);
+CREATE INDEX session_tags_tag ON session_tags (tag);
+CREATE VIRTUAL TABLE search_fts USING fts5(
+    kind UNINDEXED, id UNINDEXED, technique_id UNINDEXED,
+    name, description, implementation, success_indicators, failure_modes,
+    tokenize = 'porter unicode61'
+);
+"""
+
+# Techniques and sub-methods share one FTS table, so their bm25 scores come
+# from the same corpus statistics and can be ranked against each other.
+# Column weights: a hit in a name outranks one in the body text.
+SEARCH_WEIGHTS = "0, 0, 0, 10.0, 4.0, 2.0, 1.0, 1.0"
+
+TECHNIQUE_TABLES = ("techniques", "sub_methods", "search_fts", "related_techniques", "session_tags")
+
+
+def technique_hash(tech):
+    canonical = json.dumps(tech, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def connect(db_path):
+    """Open the database, recreating it if the schema is missing or outdated."""
+    conn = sqlite3.connect(db_path)
+    try:
+        version = conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+    except sqlite3.OperationalError:
+        version = None
+    if version is None or version[0] != SCHEMA_VERSION:
+        conn.close()
+        db_path.unlink(missing_ok=True)
+        conn = sqlite3.connect(db_path)
+        conn.executescript(SCHEMA)
+        conn.execute("INSERT INTO meta VALUES ('schema', ?)", (SCHEMA_VERSION,))
+    return conn
+
+
+def delete_technique(conn, tech_id):
+    for table in TECHNIQUE_TABLES:
+        column = "id" if table == "techniques" else "technique_id"
+        conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (tech_id,))
+
+
+def insert_technique(conn, tech, digest):
+    tid = tech["id"]
+    conn.execute(
+        "INSERT INTO techniques VALUES (?, ?, ?, ?, ?, ?)",
+        (tid, tech["tactic_id"], tech["name"], tech.get("status", "published"),
+         tech.get("added_version"), digest),
+    )
+    conn.execute(
+        "INSERT INTO search_fts VALUES ('technique', ?, ?, ?, ?, ?, ?, ?)",
+        (tid, tid, tech["name"], tech.get("description", ""), tech.get("implementation", ""),
+         "\n".join(tech.get("success_indicators", [])), "\n".join(tech.get("failure_modes", []))),
+    )
+    for sub in tech.get("sub_methods", []):
+        conn.execute(
+            "INSERT INTO sub_methods VALUES (?, ?, ?, ?)",
+            (sub["id"], tid, sub["name"], sub.get("status", "published")),
+        )
+        conn.execute(
+            "INSERT INTO search_fts VALUES ('sub_method', ?, ?, ?, ?, '', '', '')",
+            (sub["id"], tid, sub["name"], sub.get("description", "")),
+        )
+    conn.executemany(
+        "INSERT OR IGNORE INTO related_techniques VALUES (?, ?)",
+        [(tid, rel) for rel in tech.get("related_techniques", [])],
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO session_tags VALUES (?, ?)",
+        [(tid, tag) for tag in tech.get("session_tags", [])],
+    )
+
+
+def build_query_db(data, db_path):
+    """Bring the database at db_path in line with data.
+
+    Returns (techniques written, techniques removed, techniques unchanged).
+    """
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = connect(db_path)
+    with conn:
+        existing = dict(conn.execute("SELECT id, hash FROM techniques"))
+
+        conn.execute("DELETE FROM tactics")
+        conn.executemany(
+            "INSERT INTO tactics VALUES (?, ?, ?)",
+            [(t["id"], t["name"], t["description"]) for t in data["tactics"]],
+        )
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (data["framework"]["version"],))
+
+        written = 0
+        current = set()
+        for tech in data["techniques"]:
+            current.add(tech["id"])
+            digest = technique_hash(tech)
+            if existing.get(tech["id"]) == digest:
+                continue
+            delete_technique(conn, tech["id"])
+            insert_technique(conn, tech, digest)
+            written += 1
+
+        removed = set(existing) - current
+        for tech_id in removed:
+            delete_technique(conn, tech_id)
+
+        if written or removed:
+            conn.execute("INSERT INTO search_fts(search_fts) VALUES ('optimize')")
+    if written or removed:
+        conn.execute("VACUUM")
+    conn.close()
+
+    return written, len(removed), len(current) - written
+
+
+def fts_query(text):
+    """Quote each search term so FTS5 operators in user input are literal."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in text.split())
+
+
+def query(db_path, text="", tactic=None, status=None, tag=None, related=None, limit=20):
+    """Search techniques and sub-methods, best match first.
+
+    Filters apply to the technique (or a sub-method's parent technique).
+    Without search text, matching techniques are listed in ID order.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+
+    filters, params = [], []
+    if tactic:
+        filters.append("t.tactic_id = ?")
+        params.append(tactic.upper())
+    if status:
+        filters.append("t.status = ?")
+        params.append(status)
+    if tag:
+        filters.append("t.id IN (SELECT technique_id FROM session_tags WHERE tag = ?)")
+        params.append(tag)
+    if related:
+        filters.append(
+            "(t.id IN (SELECT related_id FROM related_techniques WHERE technique_id = ?)"
+            " OR t.id IN (SELECT technique_id FROM related_techniques WHERE related_id = ?))"
+        )
+        params += [related.upper(), related.upper()]
+    where = "".join(f" AND {f}" for f in filters)
+
+    if text.strip():
+        match = fts_query(text)
+        sql = f"""
+            SELECT f.kind, f.id, f.name, t.id AS technique_id, t.tactic_id,
+                   COALESCE(s.status, t.status) AS status,
+                   -bm25(search_fts, {SEARCH_WEIGHTS}) AS score,
+                   snippet(search_fts, -1, '**', '**', '…', 16) AS snippet
+            FROM search_fts f
+            JOIN techniques t ON t.id = f.technique_id
+            LEFT JOIN sub_methods s ON f.kind = 'sub_method' AND s.id = f.id
+            WHERE search_fts MATCH ?{where}
+            ORDER BY score DESC
+            LIMIT ?
+        """
+        rows = conn.execute(sql, [match, *params, limit])
+    else:
+        sql = f"""
+            SELECT 'technique' AS kind, t.id, t.name, t.id AS technique_id, t.tactic_id, t.status,
+                   NULL AS score, NULL AS snippet
+            FROM techniques t WHERE 1{where}
+            ORDER BY t.id LIMIT ?
+        """
+        rows = conn.execute(sql, [*params, limit])
+
+    results = [dict(r) for r in rows]
+    conn.close()
+    return results
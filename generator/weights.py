@@ -0,0 +1,252 @@
+"""
+FORGED Page Weight Report
+Breaks every generated page into markup, inline JS, inline JSON, JSON-LD,
+inline CSS and external assets, raw and gzip-compressed. Checks each page
+against the per-page-type budgets in generator/budgets.json and diffs the
+totals against the previous build's report.
+"""
+
+import gzip
+import json
+import re
+
+from css import page_type
+
+SCRIPT_BLOCK_RE = re.compile(r'<script\b([^>]*)>(.*?)</script>', re.S)
+STYLE_BLOCK_RE = re.compile(r'<style\b[^>]*>(.*?)</style>', re.S)
+TYPE_ATTR_RE = re.compile(r'\btype="([^"]*)"')
+EXTERNAL_RE = re.compile(
+    r'<link rel="stylesheet" href="([^"]+)"|<script\b[^>]*\bsrc="([^"]+)"|<img\b[^>]*\bsrc="([^"]+)"'
+)
+PICTURE_RE = re.compile(r'<picture>(.*?)</picture>', re.S)
+SOURCE_SRCSET_RE = re.compile(r'<source\b[^>]*\bsrcset="([^"]+)"')
+
+CATEGORIES = ("markup", "inline_js", "inline_json", "json_ld", "inline_css", "external")
+METRICS = CATEGORIES + ("html", "total")
+
+
+def gz_size(data):
+    return len(gzip.compress(data, compresslevel=9, mtime=0))
+
+
+def split_page(html):
+    """Split a page's source into {category: text} for the inline categories."""
+    parts = {c: [] for c in CATEGORIES if c != "external"}
+
+    def take_script(match):
+        attrs, body = match.groups()
+        if re.search(r'\bsrc="', attrs):
+            return match.group(0)
+        script_type = TYPE_ATTR_RE.search(attrs)
+        script_type = script_type.group(1) if script_type else "text/javascript"
+        if script_type == "application/ld+json":
+            parts["json_ld"].append(body)
+        elif script_type.endswith("json"):
+            parts["inline_json"].append(body)
+        else:
+            parts["inline_js"].append(body)
+        return ""
+
+    def take_style(match):
+        parts["inline_css"].append(match.group(1))
+        return ""
+
+    markup = SCRIPT_BLOCK_RE.sub(take_script, html)
+    markup = STYLE_BLOCK_RE.sub(take_style, markup)
+    parts["markup"].append(markup)
+    return {c: "".join(texts) for c, texts in parts.items()}
+
+
+def external_assets(out_dir, page, html):
+    """Local files a page loads: stylesheets, scripts and images.
+
+    A <picture> counts as the 1x candidate of its first <source> (the WebP
+    browsers actually download), not its <img> fallback.
+    """
+    urls = []
+
+    def take_picture(match):
+        source = SOURCE_SRCSET_RE.search(match.group(1))
+        if not source:
+            return match.group(0)
+        urls.append(source.group(1).split(",")[0].split()[0])
+        return ""
+
+    html = PICTURE_RE.sub(take_picture, html)
+    urls += [next(g for g in groups if g) for groups in EXTERNAL_RE.findall(html)]
+
+    files = set()
+    for url in urls:
+        if url.startswith(("http:", "https:", "//", "data:")):
+            continue
+        path = (page.parent / url.split("?")[0]).resolve()
+        if path.is_file() and out_dir.resolve() in path.parents:
+            files.add(path)
+    return files
+
+
+def measure_page(out_dir, page, asset_sizes):
+    """Return {category: [raw bytes, gzip bytes]} plus page and grand totals."""
+    raw = page.read_bytes()
+    html = raw.decode("utf-8")
+    weights = {}
+    for category, text in split_page(html).items():
+        data = text.encode("utf-8")
+        weights[category] = [len(data), gz_size(data) if data else 0]
+
+    external = [0, 0]
+    for path in external_assets(out_dir, page, html):
+        if path not in asset_sizes:
+            data = path.read_bytes()
+            asset_sizes[path] = (len(data), gz_size(data))
+        external[0] += asset_sizes[path][0]
+        external[1] += asset_sizes[path][1]
+    weights["external"] = external
+
+    weights["html"] = [len(raw), gz_size(raw)]
+    weights["total"] = [len(raw) + external[0], weights["html"][1] + external[1]]
+    return weights
+
+
+def measure_site(out_dir, exclude=(), measured=None):
+    """Measure every page under out_dir. Returns {relative path: {type, weights}}.
+
+    measured caches weights by (relative path, page bytes) across calls, so a
+    page that is identical in another site tree (whose assets are shared) is
+    not measured twice.
+    """
+    asset_sizes = {}
+    measured = {} if measured is None else measured
+    report = {}
+    for page in sorted(out_dir.rglob("*.html")):
+        rel = page.relative_to(out_dir)
+        if rel.parts[0] in exclude:
+            continue
+        key = (rel.as_posix(), page.read_bytes())
+        if key not in measured:
+            measured[key] = measure_page(out_dir, page, asset_sizes)
+        report[rel.as_posix()] = {"type": page_type(rel), "weights": measured[key]}
+    return report
+
+
+def validate_budgets(budgets):
+    """Raise ValueError naming every budget metric that does not exist."""
+    unknown = []
+    for ptype, limits in budgets.items():
+        for metric in limits:
+            category, _, kind = metric.rpartition("_")
+            if category not in METRICS or kind not in ("raw", "gz"):
+                unknown.append(f"{ptype}.{metric}")
+    if unknown:
+        raise ValueError(
+            f"unknown budget metric(s): {', '.join(unknown)}; a metric is one of "
+            f"{', '.join(METRICS)} followed by _raw or _gz"
+        )
+
+
+def check_budgets(report, budgets):
+    """Return a list of budget violations as readable strings.
+
+    Budgets map a page type to {metric: max bytes}; a metric is a category
+    name with a "_raw" or "_gz" suffix, e.g. "html_gz" or "inline_json_raw".
+    """
+    violations = []
+    for rel, entry in report.items():
+        for metric, limit in budgets.get(entry["type"], {}).items():
+            category, _, kind = metric.rpartition("_")
+            value = entry["weights"][category][0 if kind == "raw" else 1]
+            if value > limit:
+                violations.append(f"{rel}: {metric} {value:,} bytes > budget {limit:,} bytes")
+    return violations
+
+
+def summarize(report):
+    """Aggregate gzip bytes per page type: {type: {pages, category: max gz bytes}}."""
+    summary = {}
+    for entry in report.values():
+        row = summary.setdefault(entry["type"], {"pages": 0})
+        row["pages"] += 1
+        for category, (_, gz) in entry["weights"].items():
+            row[category] = max(row.get(category, 0), gz)
+    return summary
+
+
+def format_delta(now, before):
+    if before is None:
+        return ""
+    delta = now - before
+    if delta == 0:
+        return "  (=)"
+    return f"  ({'+' if delta > 0 else '-'}{abs(delta) / 1024:.1f} KB)"
+
+
+def format_report(report, previous):
+    """Render the per-type summary with deltas against the previous build."""
+    summary = summarize(report)
+    before = summarize(previous) if previous else {}
+    lines = ["  Per page type: largest html and total (gzip), then the heaviest page's breakdown, gzip KB (raw KB):"]
+    for ptype, row in sorted(summary.items()):
+        heaviest = max(
+            (e for e in report.values() if e["type"] == ptype),
+            key=lambda e: e["weights"]["total"][1],
+        )
+        prev = before.get(ptype, {})
+        parts = ", ".join(
+            f"{c} {heaviest['weights'][c][1] / 1024:.1f} ({heaviest['weights'][c][0] / 1024:.1f})"
+            for c in CATEGORIES if heaviest["weights"][c][0]
+        )
+        lines.append(
+            f"  {ptype} ({row['pages']} pages): html {row['html'] / 1024:.1f} KB"
+            f"{format_delta(row['html'], prev.get('html'))}, "
+            f"total {row['total'] / 1024:.1f} KB{format_delta(row['total'], prev.get('total'))}"
+        )
+        lines.append(f"      {parts}")
+
+    if previous:
+        changes = sorted(
+            (
+                (entry["weights"]["total"][1] - previous[rel]["weights"]["total"][1], rel)
+                for rel, entry in report.items() if rel in previous
+            ),
+            key=lambda c: -abs(c[0]),
+        )
+        changes = [c for c in changes if c[0]]
+        added = len(set(report) - set(previous))
+        removed = len(set(previous) - set(report))
+        lines.append(
+            f"  vs previous build: {len(changes)} page(s) changed, {added} added, {removed} removed"
+        )
+        for delta, rel in changes[:5]:
+            lines.append(f"      {rel}{format_delta(delta, 0)}")
+    return "\n".join(lines)
+
+
+def page_weight_report(out_dir, budgets_path, history_path, exclude=(), measured=None):
+    """Measure out_dir, print the report and save it for the next build's diff.
+
+    Returns the list of budget violations. Raises ValueError if the budgets
+    file names a metric that does not exist.
+    """
+    budgets = {}
+    if budgets_path.exists():
+        with open(budgets_path, "r") as f:
+            budgets = json.load(f)
+        try:
+            validate_budgets(budgets)
+        except ValueError as e:
+            raise ValueError(f"{budgets_path}: {e}") from None
+
+    report = measure_site(out_dir, exclude, measured)
+    previous = None
+    if history_path.exists():
+        with open(history_path, "r") as f:
+            previous = json.load(f)
+
+    print(format_report(report, previous))
+    violations = check_budgets(report, budgets)
+
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(history_path, "w") as f:
+        json.dump(report, f)
+
+    return violations
@@ -0,0 +1,57 @@
+/**
+ * FORGED Banner benchmark - reports frame times and banner main-thread cost
+ */
+
+(function() {
+    const WINDOW = 300;          // frames kept for the rolling report
+    const frameTimes = [];
+    const bannerTimes = [];
+    let last = 0;
+
+    // Time every banner tick (precompute slices and paints alike)
+    const tick = ForgedBanner.prototype.tick;
+    ForgedBanner.prototype.tick = function(now) {
+        const start = performance.now();
+        tick.call(this, now);
+        push(bannerTimes, performance.now() - start);
+    };
+
+    function push(list, value) {
+        list.push(value);
+        if (list.length > WINDOW) list.shift();
+    }
+
+    function stats(list) {
+        if (!list.length) return { mean: 0, p95: 0, max: 0 };
+        const sorted = list.slice().sort((a, b) => a - b);
+        const mean = sorted.reduce((a, b) => a + b, 0) / sorted.length;
+        return {
+            mean: mean,
+            p95: sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * 0.95))],
+            max: sorted[sorted.length - 1],
+        };
+    }
+
+    function row(label, s, extra) {
+        return '<tr><td>' + label + '</td><td>mean ' + s.mean.toFixed(2) + ' ms</td><td>p95 ' +
+            s.p95.toFixed(2) + ' ms</td><td>max ' + s.max.toFixed(2) + ' ms</td><td>' + (extra || '') + '</td></tr>';
+    }
+
+    function frame(now) {
+        if (last) push(frameTimes, now - last);
+        last = now;
+        requestAnimationFrame(frame);
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        const report = document.getElementById('bench-report');
+        requestAnimationFrame(frame);
+
+        setInterval(function() {
+            const janky = frameTimes.filter(t => t > 1000 / 60 + 1).length;
+            report.innerHTML =
+                row('frame time', stats(frameTimes), janky + ' / ' + frameTimes.length + ' over 16.7 ms') +
+                row('banner tick', stats(bannerTimes), bannerTimes.length + ' ticks sampled');
+        }, 500);
+    });
+})();
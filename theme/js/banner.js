@@ -29,19 +29,36 @@ const FORGED_BANNER = [
 const GLITCH_CHARS = '░▒▓█▀▄╔╗╚╝║═┃━┏┓┗┛';
 const CORRUPTION_CHARS = '!@#$%^&*<>{}[]|/\\~`';
 
+// Playback rate and per-tick main-thread budget. The glitch loop is
+// precomputed in budgeted slices, so startup never blocks matrix.js.
+const FRAME_MS = 1000 / 20;
+const FRAME_COUNT = 600;
+const BUDGET_MS = 4;
+// Banner text is split into fixed-width spans; only spans whose text
+// changed since the last painted frame are touched.
+const CHUNK = 8;
+const BASE_COLOR = '#D4A84B';
+const FLASH_COLORS = ['#C65D07', '#D4A84B', '#ff6b35', '#e8963a'];
+
 class ForgedBanner {
   constructor(element, baseFrame) {
     this.el = element;
     this.base = baseFrame;
-    this.lines = baseFrame.slice();
     this.width = baseFrame[0].length;
     this.height = baseFrame.length;
-    this.frame = 0;
     this.glitchIntensity = 0;
     this.phase = 'stable';
     this.phaseTimer = 0;
-    this.playing = true;
-    this.reducedMotion = window.matchMedia('(prefers-reduced-motion: reduce)').matches;
+
+    this.frames = [];        // precomputed [{chunks, color}]
+    this.spans = [];         // one <span> per chunk, row-major
+    this.shown = [];         // text currently in each span
+    this.shownColor = BASE_COLOR;
+    this.current = 0;
+    this.lastTick = 0;
+    this.rafId = 0;
+    this.visible = true;
+    this.motionQuery = window.matchMedia('(prefers-reduced-motion: reduce)');
   }
 
   glitchChar() {
@@ -88,11 +105,11 @@ class ForgedBanner {
     }
   }
 
-  render() {
-    this.frame++;
+  // Advance the phase state machine one step and return that frame's lines
+  // and color. Pure computation: no DOM access.
+  computeFrame() {
     this.phaseTimer++;
 
-    // Phase state machine
     if (this.phase === 'stable' && this.phaseTimer > 100) {
       if (Math.random() < 0.12) {
         this.phase = 'glitch';
@@ -124,7 +141,8 @@ class ForgedBanner {
       }
     }
 
-    let lines = this.base.slice();
+    const lines = this.base.slice();
+    let color = BASE_COLOR;
 
     if (this.glitchIntensity > 0.01) {
       const numCorrupted = Math.floor(this.height * this.glitchIntensity * 0.5);
@@ -146,11 +164,9 @@ class ForgedBanner {
         lines[row] = char.repeat(this.width);
       }
 
-      // Color flash — amber palette only
+      // Color flash — amber palette only, held for a single frame
       if (Math.random() < this.glitchIntensity * 0.25) {
-        const colors = ['#C65D07', '#D4A84B', '#ff6b35', '#e8963a'];
-        this.el.style.color = colors[Math.floor(Math.random() * colors.length)];
-        setTimeout(() => { this.el.style.color = '#D4A84B'; }, 50);
+        color = FLASH_COLORS[Math.floor(Math.random() * FLASH_COLORS.length)];
       }
     }
 
@@ -165,20 +181,117 @@ class ForgedBanner {
       }
     }
 
-    this.el.textContent = lines.join('\n');
+    return { chunks: this.toChunks(lines), color };
+  }
+
+  toChunks(lines) {
+    const chunks = [];
+    for (const line of lines) {
+      const chars = [...line];
+      for (let c = 0; c < this.width; c += CHUNK) {
+        chunks.push(chars.slice(c, c + CHUNK).join(''));
+      }
+    }
+    return chunks;
+  }
+
+  // Replace the element's text with one span per chunk and a newline per row.
+  mount() {
+    const chunks = this.toChunks(this.base);
+    const perRow = Math.ceil(this.width / CHUNK);
+    const frag = document.createDocumentFragment();
+    chunks.forEach((text, i) => {
+      const span = document.createElement('span');
+      span.textContent = text;
+      frag.appendChild(span);
+      this.spans.push(span);
+      this.shown.push(text);
+      if ((i + 1) % perRow === 0 && i + 1 < chunks.length) {
+        frag.appendChild(document.createTextNode('\n'));
+      }
+    });
+    this.el.textContent = '';
+    this.el.appendChild(frag);
+    this.el.style.color = BASE_COLOR;
+  }
+
+  // Fill the frame pool in slices so no single tick exceeds the budget.
+  precompute(deadline) {
+    while (this.frames.length < FRAME_COUNT && performance.now() < deadline) {
+      this.frames.push(this.computeFrame());
+    }
+  }
+
+  paint(frame) {
+    const { chunks, color } = frame;
+    for (let i = 0; i < chunks.length; i++) {
+      if (chunks[i] !== this.shown[i]) {
+        this.spans[i].textContent = chunks[i];
+        this.shown[i] = chunks[i];
+      }
+    }
+    if (color !== this.shownColor) {
+      this.el.style.color = color;
+      this.shownColor = color;
+    }
+  }
+
+  tick(now) {
+    this.rafId = 0;
+    const start = performance.now();
+
+    if (this.frames.length < FRAME_COUNT) {
+      this.precompute(start + BUDGET_MS);
+    } else if (now - this.lastTick >= FRAME_MS) {
+      // Skip frames we were too late for instead of replaying them
+      const steps = Math.max(1, Math.floor((now - this.lastTick) / FRAME_MS));
+      this.current = (this.current + steps) % FRAME_COUNT;
+      this.lastTick = now;
+      this.paint(this.frames[this.current]);
+    }
+
+    this.schedule();
+  }
+
+  schedule() {
+    if (this.rafId || !this.running()) return;
+    this.rafId = requestAnimationFrame(t => this.tick(t));
+  }
+
+  running() {
+    return this.visible && !document.hidden && !this.motionQuery.matches;
+  }
+
+  pause() {
+    if (this.rafId) cancelAnimationFrame(this.rafId);
+    this.rafId = 0;
+  }
+
+  update() {
+    if (this.motionQuery.matches) {
+      this.pause();
+      this.paint({ chunks: this.toChunks(this.base), color: BASE_COLOR });
+    } else if (this.running()) {
+      this.lastTick = performance.now();
+      this.schedule();
+    } else {
+      this.pause();
+    }
   }
 
   start() {
-    if (this.reducedMotion) {
-      this.el.textContent = this.base.join('\n');
-      return;
+    this.mount();
+
+    if ('IntersectionObserver' in window) {
+      new IntersectionObserver(entries => {
+        this.visible = entries[entries.length - 1].isIntersecting;
+        this.update();
+      }).observe(this.el);
     }
-    const loop = () => {
-      if (!this.playing) return;
-      this.render();
-      setTimeout(() => requestAnimationFrame(loop), 1000 / 20);
-    };
-    loop();
+    document.addEventListener('visibilitychange', () => this.update());
+    this.motionQuery.addEventListener('change', () => this.update());
+
+    this.update();
   }
 }
 
@@ -104,6 +104,109 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
+    // ==========================================
+    // PREDICTIVE PREFETCH
+    // ==========================================
+
+    // On hover/touch, warm the pages a visitor is likely to open next: the
+    // technique itself, its tactic and its first-degree related techniques.
+    // Where speculation rules are delivered (the Speculation-Rules header is
+    // only sent for the root matrix) and supported, they already prefetch the
+    // hovered link, so it is only queued here everywhere else: /v<version>/
+    // matrices, local preview servers and browsers without support.
+    const PREFETCH_CONCURRENCY = 2;
+    const PREFETCH_BUDGET_BYTES = 512 * 1024;
+    const PREFETCH_BUDGET_KEY = 'forged-prefetch-bytes';
+    const hasSpeculationRules = typeof HTMLScriptElement !== 'undefined' &&
+        typeof HTMLScriptElement.supports === 'function' &&
+        HTMLScriptElement.supports('speculationrules') &&
+        (location.pathname === '/' || location.pathname === '/index.html');
+    const prefetched = new Set();
+    const prefetchQueue = [];
+    let prefetchActive = 0;
+    let prefetchGraph = null;
+
+    function prefetchBytesUsed() {
+        return parseInt(sessionStorage.getItem(PREFETCH_BUDGET_KEY) || '0', 10);
+    }
+
+    function prefetchAllowed() {
+        const conn = navigator.connection;
+        if (conn && (conn.saveData || /(^|-)2g$/.test(conn.effectiveType || ''))) return false;
+        return prefetchBytesUsed() < PREFETCH_BUDGET_BYTES;
+    }
+
+    function techniqueGraph() {
+        if (prefetchGraph) return prefetchGraph;
+        prefetchGraph = {};
+        const dataEl = document.getElementById('framework-data');
+        if (!dataEl) return prefetchGraph;
+        try {
+            JSON.parse(dataEl.textContent).techniques.forEach(t => {
+                prefetchGraph[t.id] = { tactic: t.tactic_id, related: t.related_techniques || [] };
+            });
+        } catch (e) {
+            // No graph: fall back to prefetching only the hovered link
+        }
+        return prefetchGraph;
+    }
+
+    function pumpPrefetch() {
+        while (prefetchActive < PREFETCH_CONCURRENCY && prefetchQueue.length && prefetchAllowed()) {
+            const url = prefetchQueue.shift();
+            const link = document.createElement('link');
+            link.rel = 'prefetch';
+            link.href = url;
+            prefetchActive++;
+            const done = () => {
+                prefetchActive--;
+                const entry = performance.getEntriesByName(link.href).pop();
+                const bytes = entry ? (entry.transferSize || entry.encodedBodySize || 0) : 0;
+                sessionStorage.setItem(PREFETCH_BUDGET_KEY, String(prefetchBytesUsed() + bytes));
+                pumpPrefetch();
+            };
+            link.addEventListener('load', done);
+            link.addEventListener('error', done);
+            document.head.appendChild(link);
+        }
+    }
+
+    function queuePrefetch(urls) {
+        urls.forEach(url => {
+            if (prefetched.has(url)) return;
+            prefetched.add(url);
+            prefetchQueue.push(url);
+        });
+        pumpPrefetch();
+    }
+
+    function onPrefetchIntent(e) {
+        if (!prefetchAllowed()) return;
+        const target = e.target.closest && e.target.closest('.technique-cell, .tactic-header');
+        if (!target) return;
+
+        const urls = [];
+        if (!hasSpeculationRules) urls.push(target.getAttribute('href'));
+
+        if (target.classList.contains('technique-cell')) {
+            const techId = target.querySelector('.technique-id')?.textContent?.trim();
+            const node = techId && techniqueGraph()[techId];
+            if (node) {
+                urls.push('tactics/' + node.tactic.toLowerCase() + '.html');
+                // Related IDs can point at drafts that are not published
+                node.related
+                    .filter(id => techniqueGraph()[id])
+                    .forEach(id => urls.push('techniques/' + id.toLowerCase() + '.html'));
+            }
+        }
+        queuePrefetch(urls);
+    }
+
+    if (matrix) {
+        matrix.addEventListener('mouseover', onPrefetchIntent);
+        matrix.addEventListener('touchstart', onPrefetchIntent, { passive: true });
+    }
+
     // ==========================================
     // SELECTION MODE & EXPORT
     // ==========================================